@@ -0,0 +1,297 @@
+# capture_recorder.py
+import mmap
+import os
+import struct
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+# File layout: FILE_HEADER, then one FRAME_HEADER + payload per recorded frame.
+FILE_MAGIC = b"VNBCAP01"
+FILE_HEADER = struct.Struct("<8s")
+
+# magic, timestamp, post_id, attempt, found, center_x, center_y,
+# height, width, channels, encoding, payload_size
+FRAME_MAGIC = b"FRM0"
+FRAME_HEADER = struct.Struct("<4sdiiBiiHHBBQ")
+
+# Frame payload encodings
+ENCODING_RAW = 0
+ENCODING_DELTA = 1
+
+# Recorder compression modes
+COMPRESSION_NONE = "none"
+COMPRESSION_DELTA = "delta"
+
+# Unchanged gaps shorter than this are folded into the surrounding run
+DELTA_MIN_GAP = 16
+
+RUN_COUNT = struct.Struct("<I")
+
+
+class CaptureFormatError(Exception):
+    """Raised when a capture recording is truncated or not in the expected format."""
+    pass
+
+
+def _encode_delta(prev: np.ndarray, cur: np.ndarray) -> Optional[bytes]:
+    """Encode cur as runs of changed bytes against prev. Returns None if raw is smaller."""
+    changed = prev != cur
+    bounds = np.flatnonzero(changed[1:] != changed[:-1]) + 1
+    if changed[0]:
+        bounds = np.concatenate(([0], bounds))
+    if changed[-1]:
+        bounds = np.concatenate((bounds, [cur.size]))
+    starts = bounds[0::2]
+    ends = bounds[1::2]
+
+    if len(starts) > 1:
+        keep = (starts[1:] - ends[:-1]) > DELTA_MIN_GAP
+        starts = np.concatenate((starts[:1], starts[1:][keep]))
+        ends = np.concatenate((ends[:-1][keep], ends[-1:]))
+
+    runs = np.empty((len(starts), 2), dtype="<u4")
+    runs[:, 0] = starts
+    runs[:, 1] = ends - starts
+
+    payload_size = RUN_COUNT.size + runs.nbytes + int(runs[:, 1].sum())
+    if payload_size >= cur.nbytes:
+        return None
+
+    # Reuse the comparison buffer as a +1/-1 edge map; its running sum marks the runs
+    coverage = changed.view(np.int8)
+    coverage[:] = 0
+    coverage[starts] = 1
+    coverage[ends[ends < cur.size]] = -1
+    np.cumsum(coverage, dtype=np.int8, out=coverage)
+    literals = cur[coverage.view(bool)]
+
+    return RUN_COUNT.pack(len(runs)) + runs.tobytes() + literals.tobytes()
+
+
+def _complete_length(f, size: int) -> int:
+    """Return the offset just past the last complete frame in an open recording.
+
+    Only a short tail (partial header or payload running past EOF) is treated
+    as incomplete; a bad frame magic means corruption and raises instead.
+    """
+    offset = FILE_HEADER.size
+    while offset + FRAME_HEADER.size <= size:
+        f.seek(offset)
+        header = FRAME_HEADER.unpack(f.read(FRAME_HEADER.size))
+        if header[0] != FRAME_MAGIC:
+            raise CaptureFormatError(f"Bad frame header at offset {offset} in {f.name}")
+        payload_end = offset + FRAME_HEADER.size + header[-1]
+        if payload_end > size:
+            break
+        offset = payload_end
+    return offset
+
+
+class CaptureRecorder:
+    """Append raw screenshots and their detection metadata to a capture recording."""
+
+    def __init__(self, path: str, compression: str = COMPRESSION_NONE):
+        if compression not in (COMPRESSION_NONE, COMPRESSION_DELTA):
+            raise ValueError(f"Unknown capture compression: {compression!r}")
+
+        self.path = path
+        self.compression = compression
+        self._prev: Optional[np.ndarray] = None
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._file = open(path, "r+b" if os.path.exists(path) else "w+b")
+        size = os.fstat(self._file.fileno()).st_size
+        if size < FILE_HEADER.size:
+            self._file.truncate(0)
+            self._file.write(FILE_HEADER.pack(FILE_MAGIC))
+            self._file.flush()
+        else:
+            (magic,) = FILE_HEADER.unpack(self._file.read(FILE_HEADER.size))
+            if magic != FILE_MAGIC:
+                self._file.close()
+                raise CaptureFormatError(f"{path} is not a capture recording")
+
+            # Drop a frame left half-written by a crash so new frames stay readable
+            try:
+                complete = _complete_length(self._file, size)
+            except CaptureFormatError:
+                self._file.close()
+                raise
+            if complete < size:
+                print(f"[capture_recorder] Discarding {size - complete} bytes of incomplete frame data")
+                self._file.truncate(complete)
+            self._file.seek(complete)
+        print(f"[capture_recorder] Recording frames to {path} (compression: {compression})")
+
+    def record(self, bgr: np.ndarray, post_id: Optional[int], attempt: int,
+               center: Optional[Tuple[int, int]]) -> None:
+        """Append one frame with its timestamp, post id, attempt number and detection result."""
+        if self.compression == COMPRESSION_DELTA:
+            # One owned copy, kept as the base for the next delta
+            frame = np.array(bgr, dtype=np.uint8, order="C")
+        else:
+            frame = np.ascontiguousarray(bgr, dtype=np.uint8)
+        h, w, channels = frame.shape
+        flat = frame.reshape(-1)
+
+        payload = None
+        if self.compression == COMPRESSION_DELTA and self._prev is not None and self._prev.shape == flat.shape:
+            payload = _encode_delta(self._prev, flat)
+
+        if payload is None:
+            encoding = ENCODING_RAW
+            payload = flat.data
+        else:
+            encoding = ENCODING_DELTA
+
+        found = center is not None
+        center_x, center_y = center if found else (-1, -1)
+        header = FRAME_HEADER.pack(
+            FRAME_MAGIC, time.time(), -1 if post_id is None else post_id, attempt,
+            int(found), center_x, center_y, h, w, channels, encoding, len(payload),
+        )
+        self._file.write(header)
+        self._file.write(payload)
+        self._file.flush()
+
+        if self.compression == COMPRESSION_DELTA:
+            self._prev = flat
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+
+    def __enter__(self) -> "CaptureRecorder":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class CaptureReplay:
+    """Memory-mapped reader for capture recordings.
+
+    Raw frames are yielded as read-only views into the mapped file with no copy.
+    Delta frames are patched into one reusable buffer per frame shape, so a
+    yielded frame is only valid until the next one is read.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        if size < FILE_HEADER.size:
+            self._file.close()
+            raise CaptureFormatError(f"{path} is too small to be a capture recording")
+
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic,) = FILE_HEADER.unpack_from(self._mm, 0)
+        if magic != FILE_MAGIC:
+            self.close()
+            raise CaptureFormatError(f"{path} is not a capture recording")
+
+        try:
+            self._index = self._build_index()
+        except CaptureFormatError:
+            self.close()
+            raise
+
+    def _build_index(self) -> List[Tuple[Dict, int]]:
+        index = []
+        offset = FILE_HEADER.size
+        end = len(self._mm)
+
+        while offset + FRAME_HEADER.size <= end:
+            (magic, timestamp, post_id, attempt, found, center_x, center_y,
+             h, w, channels, encoding, payload_size) = FRAME_HEADER.unpack_from(self._mm, offset)
+            if magic != FRAME_MAGIC:
+                raise CaptureFormatError(f"Bad frame header at offset {offset} in {self.path}")
+
+            payload_offset = offset + FRAME_HEADER.size
+            if payload_offset + payload_size > end:
+                print(f"[capture_recorder] Ignoring truncated frame at offset {offset}")
+                break
+
+            meta = {
+                "timestamp": timestamp,
+                "post_id": None if post_id < 0 else post_id,
+                "attempt": attempt,
+                "center": (center_x, center_y) if found else None,
+                "shape": (h, w, channels),
+                "encoding": encoding,
+                "payload_size": payload_size,
+            }
+            index.append((meta, payload_offset))
+            offset = payload_offset + payload_size
+
+        return index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    @property
+    def metadata(self) -> List[Dict]:
+        return [meta for meta, _ in self._index]
+
+    def frames(self) -> Iterator[Tuple[Dict, np.ndarray]]:
+        """Yield (metadata, bgr) for every recorded frame in order."""
+        buffers: Dict[Tuple[int, int, int], np.ndarray] = {}
+        prev: Optional[np.ndarray] = None
+
+        for meta, payload_offset in self._index:
+            shape = meta["shape"]
+            nbytes = shape[0] * shape[1] * shape[2]
+
+            if meta["encoding"] == ENCODING_RAW:
+                frame = np.frombuffer(self._mm, dtype=np.uint8, count=nbytes, offset=payload_offset)
+            elif meta["encoding"] == ENCODING_DELTA:
+                if prev is None or prev.size != nbytes:
+                    raise CaptureFormatError(f"Delta frame at offset {payload_offset} has no matching base frame")
+
+                frame = buffers.get(shape)
+                if frame is None:
+                    frame = buffers[shape] = np.empty(nbytes, dtype=np.uint8)
+                if prev is not frame:
+                    np.copyto(frame, prev)
+
+                (run_count,) = RUN_COUNT.unpack_from(self._mm, payload_offset)
+                runs_offset = payload_offset + RUN_COUNT.size
+                runs = np.frombuffer(self._mm, dtype="<u4", count=run_count * 2, offset=runs_offset)
+                literals_offset = runs_offset + runs.nbytes
+                literals = np.frombuffer(self._mm, dtype=np.uint8,
+                                         count=meta["payload_size"] - RUN_COUNT.size - runs.nbytes,
+                                         offset=literals_offset)
+
+                # DELTA_MIN_GAP keeps the run count small, so patch run by run
+                # with slice copies instead of building a per-byte index
+                pos = 0
+                for i in range(0, len(runs), 2):
+                    start, length = int(runs[i]), int(runs[i + 1])
+                    frame[start:start + length] = literals[pos:pos + length]
+                    pos += length
+            else:
+                raise CaptureFormatError(f"Unknown frame encoding {meta['encoding']}")
+
+            prev = frame
+            yield meta, frame.reshape(shape)
+
+    def close(self) -> None:
+        if getattr(self, "_mm", None) is not None and not self._mm.closed:
+            try:
+                self._mm.close()
+            except BufferError:
+                # Frames handed out by frames() still reference the mapping;
+                # it is released once they are garbage collected.
+                pass
+        self._file.close()
+
+    def __enter__(self) -> "CaptureReplay":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -36,3 +36,7 @@ MAX_ICON_SEARCH_RETRIES = 3
 
 # Monitor settings (1 = first physical monitor)
 MONITOR_INDEX = 1
+
+# Capture recording (None = disabled). Compression: "none" or "delta"
+CAPTURE_RECORDING_PATH = None
+CAPTURE_COMPRESSION = "delta"
@@ -1,7 +1,7 @@
 
 # icon_detector.py
 import time
-from typing import Optional, Tuple
+from typing import Dict, Iterator, Optional, Tuple
 
 import cv2
 import mss
@@ -21,7 +21,49 @@ from config import (
     SEARCH_Y_MAX,
     MIN_ASPECT_RATIO,
     MAX_ASPECT_RATIO,
+    CAPTURE_RECORDING_PATH,
+    CAPTURE_COMPRESSION,
 )
+from capture_recorder import CaptureFormatError, CaptureRecorder, CaptureReplay
+
+_capture_recorder: Optional[CaptureRecorder] = None
+_capture_recording_disabled = False
+
+
+def _disable_capture_recording(error: Exception) -> None:
+    """Turn recording off for the rest of the run; it must never block detection."""
+    global _capture_recorder, _capture_recording_disabled
+    print(f"[icon_detector] Capture recording failed, disabling it: {error}")
+    if _capture_recorder is not None:
+        try:
+            _capture_recorder.close()
+        except OSError:
+            pass
+    _capture_recorder = None
+    _capture_recording_disabled = True
+
+
+def _get_capture_recorder() -> Optional[CaptureRecorder]:
+    """Lazily open the capture recorder when CAPTURE_RECORDING_PATH is set."""
+    global _capture_recorder
+    if _capture_recorder is None and CAPTURE_RECORDING_PATH and not _capture_recording_disabled:
+        try:
+            _capture_recorder = CaptureRecorder(str(CAPTURE_RECORDING_PATH), CAPTURE_COMPRESSION)
+        except (OSError, ValueError, CaptureFormatError) as e:
+            _disable_capture_recording(e)
+    return _capture_recorder
+
+
+def _record_capture(bgr: np.ndarray, post_id: Optional[int], attempt: int,
+                    center: Optional[Tuple[int, int]]) -> None:
+    """Append a frame to the capture recording, if enabled."""
+    recorder = _get_capture_recorder()
+    if recorder is None:
+        return
+    try:
+        recorder.record(bgr, post_id, attempt, center)
+    except (OSError, ValueError) as e:
+        _disable_capture_recording(e)
 
 
 def _take_screenshot_bgr() -> np.ndarray:
@@ -140,6 +182,8 @@ def locate_notepad_icon_center(save_screenshot: bool = False, post_id: Optional[
     for attempt in range(1, MAX_ICON_SEARCH_RETRIES + 1):
         bgr = _take_screenshot_bgr()
         center = _find_best_blue_region(bgr)
+
+        _record_capture(bgr, post_id, attempt, center)
         
         if center is not None:
             print(f"[icon_detector] Icon found at {center} on attempt {attempt}.")
@@ -151,4 +195,12 @@ def locate_notepad_icon_center(save_screenshot: bool = False, post_id: Optional[
         time.sleep(0.5)
 
     print("[icon_detector] Failed to locate icon after retries.")
-    return None
\ No newline at end of file
+    return None
+
+
+def replay_capture_recording(path: str) -> Iterator[Tuple[Dict, Optional[Tuple[int, int]]]]:
+    """Feed recorded frames back through detection. Yields (metadata, new_center)."""
+    with CaptureReplay(path) as replay:
+        print(f"[icon_detector] Replaying {len(replay)} recorded frames from {path}...")
+        for meta, bgr in replay.frames():
+            yield meta, _find_best_blue_region(bgr)
@@ -0,0 +1,219 @@
+# test_capture_recorder.py
+import numpy as np
+import pytest
+
+from capture_recorder import (
+    COMPRESSION_DELTA,
+    ENCODING_DELTA,
+    ENCODING_RAW,
+    FILE_HEADER,
+    FRAME_HEADER,
+    RUN_COUNT,
+    CaptureFormatError,
+    CaptureRecorder,
+    CaptureReplay,
+)
+
+
+# Byte offset of the encoding field in FRAME_HEADER:
+# magic(4) timestamp(8) post_id(4) attempt(4) found(1) center_x(4) center_y(4)
+# height(2) width(2) channels(1)
+FRAME_ENCODING_OFFSET = 4 + 8 + 4 + 4 + 1 + 4 + 4 + 2 + 2 + 1
+
+
+def _desktop(h: int = 120, w: int = 160, seed: int = 0) -> np.ndarray:
+    """Random BGR frame, sliced from BGRA like mss screenshots."""
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 256, (h, w, 4), dtype=np.uint8)[:, :, :3]
+
+
+def _with_icon(bgr: np.ndarray, x: int, y: int) -> np.ndarray:
+    frame = bgr.copy()
+    frame[y:y + 20, x:x + 20] = (200, 120, 20)
+    return frame
+
+
+def _replay_all(path):
+    with CaptureReplay(path) as replay:
+        return [(meta, bgr.copy()) for meta, bgr in replay.frames()]
+
+
+def test_cut_file_then_append_then_replay(tmp_path):
+    path = str(tmp_path / "captures.vnbcap")
+    base = _desktop()
+    with CaptureRecorder(path) as recorder:
+        recorder.record(base, 1, 1, None)
+        recorder.record(_with_icon(base, 10, 10), 1, 2, (20, 20))
+
+    with open(path, "r+b") as f:
+        f.truncate(f.seek(0, 2) - 1000)
+
+    appended = [_with_icon(base, 40 + i * 10, 30) for i in range(3)]
+    with CaptureRecorder(path, COMPRESSION_DELTA) as recorder:
+        for i, frame in enumerate(appended, start=1):
+            recorder.record(frame, 2, i, None)
+
+    replayed = _replay_all(path)
+    assert [meta["post_id"] for meta, _ in replayed] == [1, 2, 2, 2]
+    for (_, bgr), expected in zip(replayed, [base] + appended):
+        assert np.array_equal(bgr, expected)
+
+
+def test_cut_delta_frame_then_append_keeps_new_session(tmp_path):
+    path = str(tmp_path / "captures.vnbcap")
+    base = _desktop()
+    with CaptureRecorder(path, COMPRESSION_DELTA) as recorder:
+        recorder.record(base, 1, 1, None)
+        recorder.record(_with_icon(base, 10, 10), 1, 2, None)
+
+    with open(path, "r+b") as f:
+        f.truncate(f.seek(0, 2) - 5)
+
+    with CaptureRecorder(path, COMPRESSION_DELTA) as recorder:
+        recorder.record(_with_icon(base, 50, 50), 2, 1, None)
+
+    replayed = _replay_all(path)
+    assert [meta["post_id"] for meta, _ in replayed] == [1, 2]
+    assert np.array_equal(replayed[1][1], _with_icon(base, 50, 50))
+
+
+def test_recorder_refuses_corrupt_frame_magic(tmp_path):
+    path = str(tmp_path / "captures.vnbcap")
+    base = _desktop()
+    with CaptureRecorder(path) as recorder:
+        for attempt in range(1, 4):
+            recorder.record(_with_icon(base, attempt * 10, 10), 1, attempt, None)
+
+    second_frame = FILE_HEADER.size + FRAME_HEADER.size + base.size
+    with open(path, "r+b") as f:
+        f.seek(second_frame)
+        f.write(b"XXXX")
+        size = f.seek(0, 2)
+
+    with pytest.raises(CaptureFormatError, match=f"offset {second_frame}"):
+        CaptureRecorder(path)
+    with open(path, "rb") as f:
+        assert f.seek(0, 2) == size
+
+
+def test_bad_frame_header_raises(tmp_path):
+    path = str(tmp_path / "captures.vnbcap")
+    with CaptureRecorder(path) as recorder:
+        recorder.record(_desktop(), 1, 1, None)
+    with open(path, "ab") as f:
+        f.write(b"JUNK" * FRAME_HEADER.size)
+
+    with pytest.raises(CaptureFormatError):
+        CaptureReplay(path)
+
+
+def test_round_trip_raw_delta_fallback_and_shape_change(tmp_path):
+    path = str(tmp_path / "captures.vnbcap")
+    base = _desktop()
+    frames = [
+        base,
+        _with_icon(base, 10, 10),
+        _with_icon(base, 60, 40),
+        _desktop(seed=1),
+        _desktop(h=90, w=100, seed=2),
+        _with_icon(_desktop(h=90, w=100, seed=2), 0, 0),
+    ]
+    centers = [None, (20, 20), None, None, (5, 6), None]
+    with CaptureRecorder(path, COMPRESSION_DELTA) as recorder:
+        for attempt, (frame, center) in enumerate(zip(frames, centers), start=1):
+            recorder.record(frame, 4, attempt, center)
+
+    replayed = _replay_all(path)
+    assert [meta["encoding"] for meta, _ in replayed] == [
+        ENCODING_RAW, ENCODING_DELTA, ENCODING_DELTA, ENCODING_RAW, ENCODING_RAW, ENCODING_DELTA,
+    ]
+    assert [meta["center"] for meta, _ in replayed] == centers
+    assert [meta["attempt"] for meta, _ in replayed] == list(range(1, 7))
+    for (meta, bgr), expected in zip(replayed, frames):
+        assert bgr.shape == expected.shape
+        assert np.array_equal(bgr, expected)
+    assert replayed[1][0]["payload_size"] < base.size // 10
+
+
+def test_record_does_not_alias_caller_frame(tmp_path):
+    path = str(tmp_path / "captures.vnbcap")
+    frame = np.ascontiguousarray(_desktop())
+    original = frame.copy()
+    with CaptureRecorder(path, COMPRESSION_DELTA) as recorder:
+        recorder.record(frame, None, 1, None)
+        frame[:] = 0
+        recorder.record(_with_icon(original, 30, 30), None, 2, None)
+
+    replayed = _replay_all(path)
+    assert replayed[0][0]["post_id"] is None
+    assert np.array_equal(replayed[0][1], original)
+    assert np.array_equal(replayed[1][1], _with_icon(original, 30, 30))
+
+
+def test_many_run_delta_round_trip(tmp_path):
+    path = str(tmp_path / "captures.vnbcap")
+    base = _desktop(h=200, w=300)
+    changed = base.copy()
+    changed[::5, ::40] ^= 0xFF
+    with CaptureRecorder(path, COMPRESSION_DELTA) as recorder:
+        recorder.record(base, 1, 1, None)
+        recorder.record(changed, 1, 2, None)
+
+    replayed = _replay_all(path)
+    assert replayed[1][0]["encoding"] == ENCODING_DELTA
+    assert np.array_equal(replayed[1][1], changed)
+
+
+def test_truncated_tail_is_ignored_on_replay(tmp_path):
+    path = str(tmp_path / "captures.vnbcap")
+    base = _desktop()
+    with CaptureRecorder(path) as recorder:
+        recorder.record(base, 1, 1, None)
+        recorder.record(_with_icon(base, 10, 10), 1, 2, None)
+
+    with open(path, "r+b") as f:
+        f.truncate(f.seek(0, 2) - 1)
+
+    replayed = _replay_all(path)
+    assert len(replayed) == 1
+    assert np.array_equal(replayed[0][1], base)
+
+
+def test_unknown_encoding_raises(tmp_path):
+    path = str(tmp_path / "captures.vnbcap")
+    with CaptureRecorder(path) as recorder:
+        recorder.record(_desktop(), 1, 1, None)
+
+    # encoding(1) payload_size(8) follow; fails loudly if the layout changes
+    assert FRAME_HEADER.size == FRAME_ENCODING_OFFSET + 1 + 8
+    with open(path, "r+b") as f:
+        f.seek(FILE_HEADER.size + FRAME_ENCODING_OFFSET)
+        assert f.read(1) == bytes([ENCODING_RAW])
+        f.seek(FILE_HEADER.size + FRAME_ENCODING_OFFSET)
+        f.write(bytes([9]))
+
+    with CaptureReplay(path) as replay:
+        with pytest.raises(CaptureFormatError, match="Unknown frame encoding 9"):
+            list(replay.frames())
+
+
+def test_identical_delta_as_last_frame(tmp_path):
+    path = str(tmp_path / "captures.vnbcap")
+    base = _desktop()
+    with CaptureRecorder(path, COMPRESSION_DELTA) as recorder:
+        recorder.record(base, 1, 1, None)
+        recorder.record(base.copy(), 1, 2, None)
+
+    with open(path, "rb") as f:
+        size = f.seek(0, 2)
+        f.seek(size - RUN_COUNT.size)
+        assert RUN_COUNT.unpack(f.read(RUN_COUNT.size)) == (0,)
+
+    replayed = _replay_all(path)
+    meta = replayed[1][0]
+    assert meta["encoding"] == ENCODING_DELTA
+    assert meta["payload_size"] == RUN_COUNT.size
+    # Zero runs: the literals offset sits exactly at the end of the mapping
+    literals_offset = size - meta["payload_size"] + RUN_COUNT.size
+    assert literals_offset == size
+    assert np.array_equal(replayed[1][1], base)